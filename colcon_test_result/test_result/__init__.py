@@ -38,27 +38,34 @@ class Result:
 
         The `path` is not changed.
 
+        :param result: The other result
+        """
+        self.add_result_counts(result)
+        self.details += result.details
+
+    def add_result_counts(self, result):
+        """
+        Add only the counts from another result to this one.
+
+        Neither the `path` nor the `details` are changed.
+
         :param result: The other result
         """
         self.test_count += result.test_count
         self.error_count += result.error_count
         self.failure_count += result.failure_count
         self.skipped_count += result.skipped_count
-        self.details += result.details
 
     def __str__(self):  # noqa: D105
-        data = {}
-        for slot in self.__slots__:
-            data[slot] = getattr(self, slot)
-            if slot in ('test_count', 'error_count', 'failure_count'):
-                data[slot + '_plural'] = 's' if data[slot] != 1 else ''
+        test_count = self.test_count
+        error_count = self.error_count
+        failure_count = self.failure_count
         return \
-            '{path}: ' \
-            '{test_count} test{test_count_plural}, ' \
-            '{error_count} error{error_count_plural}, ' \
-            '{failure_count} failure{failure_count_plural}, ' \
-            '{skipped_count} skipped' \
-            .format(**data)
+            f'{self.path}: ' \
+            f"{test_count} test{'s' if test_count != 1 else ''}, " \
+            f"{error_count} error{'s' if error_count != 1 else ''}, " \
+            f"{failure_count} failure{'s' if failure_count != 1 else ''}, " \
+            f'{self.skipped_count} skipped'
 
 
 class TestResultExtensionPoint:
@@ -72,9 +79,11 @@ class TestResultExtensionPoint:
     """
 
     """The version of the test result extension interface."""
-    EXTENSION_POINT_VERSION = '1.0'
+    EXTENSION_POINT_VERSION = '1.1'
 
-    def get_test_results(self, basepath, *, collect_details, files=None):
+    def get_test_results(
+        self, basepath, *, collect_details, files=None, jobs=None
+    ):
         """
         Get all test results under the given basepath.
 
@@ -85,6 +94,8 @@ class TestResultExtensionPoint:
           should be collected
         :param files: If passed the argument must be a set and it is being
           populated with all files providing result information
+        :param jobs: The maximum number of parallel jobs, if None the
+          extension decides
         :returns: A set of Result instances
         """
         raise NotImplementedError()
@@ -104,7 +115,7 @@ def get_test_result_extensions(*, exclude_names=None):
     return order_extensions_by_name(extensions)
 
 
-def get_test_results(basepath, *, collect_details, files=None):
+def get_test_results(basepath, *, collect_details, files=None, jobs=None):
     """
     Get the test results.
 
@@ -113,6 +124,8 @@ def get_test_results(basepath, *, collect_details, files=None):
       should be collected
     :param files: If passed the argument must be a set and it is being
       populated with all files providing result information
+    :param jobs: The maximum number of parallel jobs, if None each
+      extension decides
     :returns: A set of Result instances
     """
     extensions = get_test_result_extensions()
@@ -126,19 +139,20 @@ def get_test_results(basepath, *, collect_details, files=None):
         kwargs = {'collect_details': collect_details}
         if 'files' in signature.parameters:
             kwargs['files'] = files
+        if 'jobs' in signature.parameters:
+            kwargs['jobs'] = jobs
 
         try:
             test_results = func(
                 Path(basepath), **kwargs)
             assert isinstance(test_results, set), \
                 'get_test_results() should return a set'
-        except Exception as e:  # noqa: F841
+        except Exception as e:  # noqa: B902
             # catch exceptions raised in test result extension
             exc = traceback.format_exc()
             logger.error(
                 'Exception in test result extension '
-                "'{extension.TEST_RESULT_NAME}': {e}\n{exc}"
-                .format_map(locals()))
+                f"'{extension.TEST_RESULT_NAME}': {e}\n{exc}")
             # skip failing extension, continue with next one
             continue
         all_test_results |= test_results
@@ -1,10 +1,14 @@
 # Copyright 2016-2019 Dirk Thomas
 # Licensed under the Apache License, Version 2.0
 
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+from functools import partial
+import logging
 import os
 import traceback
-from xml.etree.ElementTree import ElementTree
-from xml.etree.ElementTree import ParseError
 
 from colcon_core.logging import colcon_logger
 from colcon_core.plugin_system import satisfies_version
@@ -13,6 +17,28 @@ from colcon_test_result.test_result import TestResultExtensionPoint
 
 logger = colcon_logger.getChild(__name__)
 
+# the number of files passed to a worker process at once
+_PARSE_CHUNKSIZE = 32
+
+# use the faster libxml2 based parser if available
+try:
+    from lxml import etree
+except ImportError:
+    from xml.etree import ElementTree as etree  # noqa: N813
+    _PARSER_OPTIONS = {}
+    _PARSER = None
+else:
+    _PARSER_OPTIONS = {
+        'collect_ids': False,
+        'huge_tree': True,
+        'resolve_entities': False,
+    }
+    _PARSER = etree.XMLParser(**_PARSER_OPTIONS)
+
+# files smaller than this are parsed into a tree at once which is faster
+# than processing the events of an incremental parse
+_INCREMENTAL_PARSE_MIN_SIZE = 1024 * 1024
+
 
 class XunitTestResult(TestResultExtensionPoint):
     """
@@ -26,44 +52,139 @@ class XunitTestResult(TestResultExtensionPoint):
     def __init__(self):  # noqa: D107
         super().__init__()
         satisfies_version(
-            TestResultExtensionPoint.EXTENSION_POINT_VERSION, '^1.0')
+            TestResultExtensionPoint.EXTENSION_POINT_VERSION, '^1.1')
 
     def get_test_results(  # noqa: D102
-        self, basepath, *, collect_details, files=None
+        self, basepath, *, collect_details, files=None, jobs=None
     ):
         results = set()
 
-        for dirpath, dirnames, filenames in os.walk(str(basepath)):
-            # skip subdirectories starting with a dot
-            dirnames[:] = filter(lambda d: not d.startswith('.'), dirnames)
-            dirnames.sort()
-
-            for filename in sorted(filenames):
-                if not filename.endswith('.xml'):
-                    continue
-
-                path = os.path.join(dirpath, filename)
-                try:
-                    result = parse_xunit_xml(
-                        path, get_testcases=collect_details)
-                except ParseError as e:  # noqa: F841
-                    logger.warning(
-                        "Skipping '{path}': {e}".format_map(locals()))
-                    continue
-                except ValueError as e:  # noqa: F841
-                    logger.debug("Skipping '{path}': {e}".format_map(locals()))
-                    continue
-                except Exception as e:  # noqa: F841
-                    exc = traceback.format_exc()
-                    logger.error(
-                        "Skipping '{path}': {e}\n{exc}".format_map(locals()))
-                    continue
-                results.add(result)
-                if files is not None:
-                    files.add(path)
+        # starting worker processes costs more than parsing the result files
+        # of a typical build takes, so only parse in parallel when requested
+        if jobs is None:
+            jobs = 1
+        paths = _get_xml_paths(str(basepath), jobs=jobs)
+        parse = partial(
+            _parse_xunit_xml_safely, get_testcases=collect_details,
+            log_level=logger.getEffectiveLevel())
+        # the files are independent of each other and can be parsed in
+        # parallel, only worth it if there is more than a single chunk
+        if jobs > 1 and len(paths) > _PARSE_CHUNKSIZE:
+            # don't start more processes than there are chunks
+            chunk_count = -(-len(paths) // _PARSE_CHUNKSIZE)
+            with ProcessPoolExecutor(
+                max_workers=min(jobs, chunk_count)
+            ) as executor:
+                outcomes = list(
+                    executor.map(parse, paths, chunksize=_PARSE_CHUNKSIZE))
+        else:
+            outcomes = map(parse, paths)
+
+        for path, (result, skip_reason) in zip(paths, outcomes):
+            if result is None:
+                if skip_reason is not None:
+                    logger.log(*skip_reason)
+                continue
+            results.add(result)
+            if files is not None:
+                files.add(path)
         return results
 
 
+def _parse_xunit_xml_safely(path, *, get_testcases, log_level):
+    # return the log level and message instead of raising the exception
+    # since tracebacks can't be passed back from a worker process
+    # the log level is passed explicitly since the logging configuration
+    # isn't necessarily inherited by a worker process
+    try:
+        return parse_xunit_xml(path, get_testcases=get_testcases), None
+    except (etree.ParseError, ValueError) as e:
+        level = logging.WARNING \
+            if isinstance(e, etree.ParseError) else logging.DEBUG
+        if level < log_level:
+            return None, None
+        return None, (level, f"Skipping '{path}': {e}")
+    except Exception as e:  # noqa: B902
+        if logging.ERROR < log_level:
+            return None, None
+        exc = traceback.format_exc()
+        return None, (logging.ERROR, f"Skipping '{path}': {e}\n{exc}")
+
+
+def _get_xml_paths(basepath, *, jobs=1):
+    if jobs > 1:
+        # on a local disk listing the directories in parallel is slower, it
+        # only helps if listing a directory is latency bound
+        scan = _scan_directories_in_parallel(basepath, jobs=jobs).pop
+    else:
+        scan = _scan_directory
+
+    # visit the directories depth-first with sorted names like os.walk()
+    paths = []
+    stack = [basepath]
+    while stack:
+        dirpath = stack.pop()
+        filepaths, dirpaths = scan(dirpath)
+        paths += sorted(filepaths)
+        # push in reverse order to visit the subdirectories alphabetically
+        stack += sorted(dirpaths, reverse=True)
+    return paths
+
+
+def _scan_directories_in_parallel(basepath, *, jobs):
+    # the GIL is released while reading the directory entries
+    scans = {}
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        pending = {executor.submit(_scan_directory, basepath): basepath}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                dirpath = pending.pop(future)
+                scans[dirpath] = future.result()
+                for path in scans[dirpath][1]:
+                    pending[executor.submit(_scan_directory, path)] = path
+    return scans
+
+
+def _scan_directory(dirpath):
+    # use the cached file type information of each directory entry
+    # rather than walking and joining paths separately
+    # directories are scanned by path rather than relative to file
+    # descriptors like os.fwalk() does: the descriptors of all pending
+    # directories would need to stay open and could exceed the limit, and
+    # the found files are parsed in other processes which can't use them
+    filepaths = []
+    dirpaths = []
+    try:
+        with os.scandir(dirpath) as entries:
+            for entry in entries:
+                # check the name first since it doesn't require any
+                # information about the file type
+                name = entry.name
+                if name.endswith('.xml') and not _is_dir(entry):
+                    filepaths.append(entry.path)
+                # skip subdirectories starting with a dot
+                # and don't follow symlinks to directories
+                elif (
+                    not name.startswith('.') and
+                    _is_dir(entry, follow_symlinks=False)
+                ):
+                    dirpaths.append(entry.path)
+    except OSError:
+        # ignore directories which can't be listed like os.walk() does
+        return [], []
+    return filepaths, dirpaths
+
+
+def _is_dir(entry, *, follow_symlinks=True):
+    # like os.walk() consider an entry which type can't be determined
+    # to not be a directory
+    try:
+        return entry.is_dir(follow_symlinks=follow_symlinks)
+    except OSError:
+        return False
+
+
 def parse_xunit_xml(path, *, get_testcases=False):
     """
     Parse an XML file and interpret it as a xUnit result file.
@@ -72,6 +193,10 @@ def parse_xunit_xml(path, *, get_testcases=False):
     https://github.com/google/googletest/blob/master/docs/advanced.md#generating-an-xml-report
     for an example of the format.
 
+    Large files are parsed incrementally and every processed test case is
+    released immediately. The whole file is always parsed to ensure it is
+    well-formed.
+
     :param str path: the path of the XML file
     :param parse_testcases: the flag if more information from each test case
       should be extracted
@@ -82,61 +207,121 @@ def parse_xunit_xml(path, *, get_testcases=False):
     :raises TypeError: if the root node is neither named 'testsuite' nor
       'testsuites'
     """
-    tree = ElementTree()
-    root = tree.parse(path)
-
     result = Result(path)
+    # the parser reads the file in large chunks itself,
+    # an additional buffer would only copy the data once more
+    with open(path, 'rb', buffering=0) as h:
+        if os.fstat(h.fileno()).st_size < _INCREMENTAL_PARSE_MIN_SIZE:
+            root = etree.parse(h, parser=_PARSER).getroot()
+            _add_results_from_tree(
+                result, root, get_testcases=get_testcases)
+            return result
+
+        events = etree.iterparse(
+            h, events=('start', 'end'), **_PARSER_OPTIONS)
+        try:
+            _add_results_from_events(
+                result, events, get_testcases=get_testcases)
+        except ValueError:
+            # parse the rest of the file first to report a malformed file
+            # as such rather than as not being a xUnit result file
+            for event, elem in events:
+                if event == 'end':
+                    elem.clear()
+            raise
+    return result
+
 
+def _add_results_from_tree(result, root, *, get_testcases):
     if root.tag == 'testsuites':
-        for child in root:
-            if child.tag == 'testsuite':
-                result.add_result(
-                    _get_testsuite_result(child, get_testcases=get_testcases))
+        testsuites = root.iterfind('testsuite')
     elif root.tag == 'testsuite':
-        result.add_result(
-            _get_testsuite_result(root, get_testcases=get_testcases))
+        testsuites = (root, )
     else:
         raise ValueError(
             "the root tag is neither 'testsuite' nor 'testsuites'")
+    for testsuite in testsuites:
+        _add_testsuite_counts(result, testsuite)
+        if get_testcases:
+            result.details += parse_testcases(testsuite)
+
+
+def _add_results_from_events(result, events, *, get_testcases):
+    # the currently open elements starting with the root
+    stack = []
+    # the depth of the test suites providing the stats and test cases
+    testsuite_depth = None
+    for event, elem in events:
+        if event == 'start':
+            stack.append(elem)
+            depth = len(stack)
+            if depth == 1:
+                if elem.tag == 'testsuites':
+                    testsuite_depth = 2
+                elif elem.tag == 'testsuite':
+                    testsuite_depth = 1
+                else:
+                    raise ValueError(
+                        "the root tag is neither 'testsuite' nor "
+                        "'testsuites'")
+            # the stats are available from the attributes in the start
+            # event already
+            if depth == testsuite_depth and elem.tag == 'testsuite':
+                _add_testsuite_counts(result, elem)
+            continue
 
-    return result
-
-
-def _get_testsuite_result(node, *, get_testcases=False):
+        stack.pop()
+        if not stack or len(stack) > testsuite_depth:
+            # the descendants of a test case are needed until its end
+            continue
+        parent = stack[-1]
+        if (
+            get_testcases and
+            elem.tag == 'testcase' and
+            len(stack) == testsuite_depth and
+            parent.tag == 'testsuite'
+        ):
+            testcase = _get_failed_testcase(elem)
+            if testcase is not None:
+                result.details.append(str(testcase))
+        # release the subtree which has been processed
+        elem.clear()
+        parent.remove(elem)
+
+
+def _add_testsuite_counts(result, node):
     # extract the integer values from various attributes
-    result = Result('')
-    for slot, attribute, default in (
-        ('test_count', 'tests', None),
-        ('error_count', 'errors', 0),
-        ('failure_count', 'failures', None),
-        ('skipped_count', 'skip', 0),
-        ('skipped_count', 'skipped', 0),
-        ('skipped_count', 'disabled', 0),
-    ):
-        try:
-            value = node.attrib[attribute]
-        except KeyError:
-            if default is None:
-                raise ValueError(
-                    "the '{attribute}' attribute is required"
-                    .format_map(locals()))
-            value = default
-        try:
-            value = int(value)
-        except ValueError:
-            raise ValueError(
-                "the '{attribute}' attribute should be an integer"
-                .format_map(locals()))
-        if value < 0:
-            raise ValueError(
-                "the '{attribute}' attribute should be a positive integer"
-                .format_map(locals()))
-        setattr(result, slot, getattr(result, slot) + value)
-
-    if get_testcases:
-        result.details += parse_testcases(node)
-
-    return result
+    # and add them directly without an intermediate result per test suite
+    attrib = node.attrib
+    test_count = _get_count(attrib, 'tests')
+    error_count = _get_count(attrib, 'errors', 0)
+    failure_count = _get_count(attrib, 'failures')
+    skipped_count = \
+        _get_count(attrib, 'skip', 0) + \
+        _get_count(attrib, 'skipped', 0) + \
+        _get_count(attrib, 'disabled', 0)
+    result.test_count += test_count
+    result.error_count += error_count
+    result.failure_count += failure_count
+    result.skipped_count += skipped_count
+
+
+def _get_count(attrib, attribute, default=None):
+    # a default of None means that the attribute is required
+    value = attrib.get(attribute)
+    if value is None:
+        if default is None:
+            raise ValueError(f"the '{attribute}' attribute is required")
+        return default
+    try:
+        value = int(value)
+    except ValueError:
+        raise ValueError(
+            f"the '{attribute}' attribute should be an integer")
+    if value < 0:
+        raise ValueError(
+            f"the '{attribute}' attribute should be a positive integer")
+    return value
 
 
 def parse_testcases(node):
@@ -158,35 +343,46 @@ def parse_testcases(node):
         return testcases
 
     # extract information
-    for child in node:
-        if child.tag != 'testcase':
-            continue
-
-        # extract information from test case
-        testcase = Testcase(
-            classname=child.attrib.get('classname'),
-            file_=child.attrib.get('file'),
-            line=child.attrib.get('line'),
-            name=child.attrib.get('name'),
-            time=child.attrib.get('time'))
-        for child2 in child:
-            if child2.tag == 'error':
-                testcase.error_messages.append(
-                    child2.attrib.get('message', ''))
-            elif child2.tag == 'failure':
-                testcase.failure_messages.append(
-                    child2.attrib.get('message', ''))
-            elif child2.tag == 'system-out':
-                testcase.system_outs.append(child2.text)
-            elif child2.tag == 'system-err':
-                testcase.system_errs.append(child2.text)
-
-        if testcase.error_messages or testcase.failure_messages:
+    for child in node.iterfind('testcase'):
+        testcase = _get_failed_testcase(child)
+        if testcase is not None:
             testcases.append(str(testcase))
 
     return testcases
 
 
+def _get_failed_testcase(node):
+    # most test cases pass, skip them before creating any objects
+    if not any(child.tag in ('error', 'failure') for child in node):
+        return None
+
+    # extract information from test case
+    attrib = node.attrib
+    testcase = Testcase(
+        classname=attrib.get('classname'),
+        file_=attrib.get('file'),
+        line=attrib.get('line'),
+        name=attrib.get('name'),
+        time=attrib.get('time'))
+    for child in node:
+        slot = _TESTCASE_CHILD_SLOTS.get(child.tag)
+        if slot is not None:
+            name, is_message = slot
+            getattr(testcase, name).append(
+                child.attrib.get('message', '') if is_message else child.text)
+    return testcase
+
+
+# the known child tags of a `testcase` tag mapped to the list of the testcase
+# and a flag if the value is the message attribute (otherwise the text)
+_TESTCASE_CHILD_SLOTS = {
+    'error': ('error_messages', True),
+    'failure': ('failure_messages', True),
+    'system-out': ('system_outs', False),
+    'system-err': ('system_errs', False),
+}
+
+
 class Testcase:
     """Information from a `testcase` tag."""
 
@@ -226,8 +422,7 @@ class Testcase:
             msg_parts.append(self.name)
         if self.file:
             suffix = ':' + self.line if self.line else ''
-            msg_parts.append(
-                '({self.file}{suffix})'.format_map(locals()))
+            msg_parts.append(f'({self.file}{suffix})')
         msg_parts = [' '.join(msg_parts)]
 
         # more information
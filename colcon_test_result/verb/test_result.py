@@ -3,6 +3,7 @@
 
 import argparse
 from contextlib import suppress
+from operator import attrgetter
 import os
 import sys
 
@@ -38,6 +39,12 @@ class TestResultVerb(VerbExtensionPoint):
             '--verbose',
             action='store_true',
             help='Show additional information for each error / failure')
+        parser.add_argument(
+            '--jobs',
+            type=_argparse_positive_int,
+            default=None,
+            help='The maximum number of threads to crawl directories and '
+                 'processes to parse result files in parallel (default: 1)')
         parser.add_argument(
             '--result-files-only',
             action='store_true',
@@ -57,17 +64,18 @@ class TestResultVerb(VerbExtensionPoint):
     def main(self, *, context):  # noqa: D102
         all_files = set() \
             if (context.args.delete or context.args.delete_yes) else None
-        all_results = list(get_test_results(
+        all_results = get_test_results(
             context.args.test_result_base,
             collect_details=context.args.verbose,
-            files=all_files))
+            files=all_files,
+            jobs=context.args.jobs)
 
         if context.args.delete or context.args.delete_yes:
             if not all_files:
                 print('No result files found to delete')
                 return 0
-            for path in sorted(all_files):
-                print('-', path)
+            all_files = sorted(all_files)
+            _write_lines(['- ' + path for path in all_files])
             while not context.args.delete_yes:
                 response = _safe_input(
                     'Delete these %d files? [y/n] ' % len(all_files))
@@ -76,35 +84,39 @@ class TestResultVerb(VerbExtensionPoint):
                 if response.lower() == 'n':
                     print('Aborted')
                     return 0
-            for path in sorted(all_files):
+            for path in all_files:
                 os.remove(path)
             print('Deleted %d files' % len(all_files))
             return 0
 
-        results = [
-            r for r in all_results
-            if r.error_count or r.failure_count or context.args.all]
-        results.sort(key=lambda r: r.path)
+        # sum up all results and select the ones to show in a single pass
+        summary = Result('Summary')
+        results = []
+        for result in all_results:
+            summary.add_result_counts(result)
+            if result.error_count or result.failure_count or context.args.all:
+                results.append(result)
+        results.sort(key=attrgetter('path'))
 
+        # collect all output to write it at once
+        lines = []
         if context.args.result_files_only:
             for result in results:
-                print(result.path)
+                lines.append(result.path)
         else:
             for result in results:
-                print(result)
+                lines.append(str(result))
                 if context.args.verbose:
                     for detail in result.details:
                         for i, line in enumerate(detail.splitlines()):
-                            print('-' if i == 0 else ' ', line)
-
-        summary = Result('Summary')
-        for result in all_results:
-            summary.add_result(result)
+                            lines.append(('- ' if i == 0 else '  ') + line)
 
         if not context.args.result_files_only:
             if results:
-                print()
-            print(summary)
+                lines.append('')
+            lines.append(str(summary))
+
+        _write_lines(lines)
 
         return 1 if summary.error_count or summary.failure_count else 0
 
@@ -117,6 +129,23 @@ def _argparse_existing_dir(path):
     return path
 
 
+def _argparse_positive_int(value):
+    try:
+        value = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            "Value '%s' is not an integer" % value)
+    if value < 1:
+        raise argparse.ArgumentTypeError(
+            "Value '%s' is not a positive integer" % value)
+    return value
+
+
+def _write_lines(lines):
+    if lines:
+        sys.stdout.write('\n'.join(lines) + '\n')
+
+
 def _safe_input(prompt=None):
     # flush stdin before checking for input
     # skip if not supported on some platforms
@@ -0,0 +1,313 @@
+# Copyright 2016-2019 Dirk Thomas
+# Licensed under the Apache License, Version 2.0
+
+import logging
+import os
+from xml.etree import ElementTree
+
+from colcon_test_result.test_result import xunit
+from colcon_test_result.test_result.xunit import parse_xunit_xml
+from colcon_test_result.test_result.xunit import XunitTestResult
+import pytest
+
+
+@pytest.fixture(params=['tree', 'incremental'])
+def parse_mode(request, monkeypatch):
+    if request.param == 'incremental':
+        monkeypatch.setattr(xunit, '_INCREMENTAL_PARSE_MIN_SIZE', 0)
+    return request.param
+
+
+@pytest.fixture(params=['lxml', 'ElementTree'])
+def etree(request, monkeypatch, parse_mode):
+    if request.param == 'lxml':
+        if xunit.etree.__name__ != 'lxml.etree':
+            pytest.skip('lxml is not available')
+    else:
+        monkeypatch.setattr(xunit, 'etree', ElementTree)
+        monkeypatch.setattr(xunit, '_PARSER_OPTIONS', {})
+        monkeypatch.setattr(xunit, '_PARSER', None)
+    return xunit.etree
+
+
+def _write_xml(tmp_path, content):
+    path = tmp_path / 'result.xml'
+    path.write_text(content)
+    return str(path)
+
+
+def _get_counts(result):
+    return (
+        result.test_count, result.error_count, result.failure_count,
+        result.skipped_count)
+
+
+@pytest.mark.parametrize('get_testcases', [False, True])
+def test_testsuite(etree, tmp_path, get_testcases):
+    path = _write_xml(
+        tmp_path,
+        '<?xml version="1.0"?>'
+        '<testsuite tests="5" failures="1" errors="1" skip="1" skipped="2" '
+        'disabled="3">'
+        '<!-- comment -->'
+        '<testcase classname="C" name="passing" time="0.1"/>'
+        '<testcase classname="C" name="failing" file="f.py" line="7">'
+        '<failure message="expected 1">trace</failure>'
+        '<system-out>out</system-out>'
+        '</testcase>'
+        '<testcase classname="C" name="raising">'
+        '<error message="boom"/><!-- comment -->'
+        '<system-err>err</system-err>'
+        '</testcase>'
+        '</testsuite>')
+
+    result = parse_xunit_xml(path, get_testcases=get_testcases)
+
+    assert result.path == path
+    assert _get_counts(result) == (5, 1, 1, 6)
+    if not get_testcases:
+        assert result.details == []
+        return
+    assert result.details == [
+        'C failing (f.py:7)\n'
+        '<<< failure message\n  expected 1\n>>>\n'
+        '<<< stdout output\n  out\n>>>',
+        'C raising\n'
+        '<<< error message\n  boom\n>>>\n'
+        '<<< stderr output\n  err\n>>>',
+    ]
+
+
+@pytest.mark.parametrize('get_testcases', [False, True])
+def test_testsuites(etree, tmp_path, get_testcases):
+    path = _write_xml(
+        tmp_path,
+        '<testsuites tests="100" failures="100">'
+        '<!-- comment -->'
+        '<testsuite tests="2" failures="1">'
+        '<testcase name="a"><failure message="a failed"/></testcase>'
+        '<testcase name="b"/>'
+        '</testsuite>'
+        '<properties>'
+        '<testcase name="ignored"><failure message="ignored"/></testcase>'
+        '</properties>'
+        '<testsuite tests="3" failures="0" errors="1">'
+        '<testcase name="c"><error message="c error"/></testcase>'
+        '</testsuite>'
+        '</testsuites>')
+
+    result = parse_xunit_xml(path, get_testcases=get_testcases)
+
+    assert _get_counts(result) == (5, 1, 1, 0)
+    if get_testcases:
+        assert result.details == [
+            'a\n<<< failure message\n  a failed\n>>>',
+            'c\n<<< error message\n  c error\n>>>',
+        ]
+    else:
+        assert result.details == []
+
+
+@pytest.mark.parametrize('get_testcases', [False, True])
+def test_nested_testsuite(etree, tmp_path, get_testcases):
+    # only the root test suite and its test cases are considered
+    path = _write_xml(
+        tmp_path,
+        '<testsuite tests="1" failures="1">'
+        '<testsuite tests="10" failures="10">'
+        '<testcase name="nested"><failure message="nested"/></testcase>'
+        '</testsuite>'
+        '<testcase name="direct"><failure message="direct"/></testcase>'
+        '</testsuite>')
+
+    result = parse_xunit_xml(path, get_testcases=get_testcases)
+
+    assert _get_counts(result) == (1, 0, 1, 0)
+    if get_testcases:
+        assert result.details == [
+            'direct\n<<< failure message\n  direct\n>>>']
+
+
+@pytest.mark.parametrize('get_testcases', [False, True])
+@pytest.mark.parametrize('attributes,message', [
+    ('failures="0"', "the 'tests' attribute is required"),
+    ('tests="1"', "the 'failures' attribute is required"),
+    ('tests="-1" failures="0"',
+     "the 'tests' attribute should be a positive integer"),
+    ('tests="1" failures="0" errors="x"',
+     "the 'errors' attribute should be an integer"),
+])
+def test_invalid_attribute(
+    etree, tmp_path, get_testcases, attributes, message
+):
+    path = _write_xml(tmp_path, f'<testsuite {attributes}/>')
+    with pytest.raises(ValueError, match=message):
+        parse_xunit_xml(path, get_testcases=get_testcases)
+
+
+@pytest.mark.parametrize('get_testcases', [False, True])
+def test_invalid_attribute_in_testsuites(etree, tmp_path, get_testcases):
+    path = _write_xml(
+        tmp_path,
+        '<testsuites>'
+        '<testsuite tests="1" failures="0"/>'
+        '<testsuite tests="1"/>'
+        '</testsuites>')
+    with pytest.raises(
+        ValueError, match="the 'failures' attribute is required"
+    ):
+        parse_xunit_xml(path, get_testcases=get_testcases)
+
+
+@pytest.mark.parametrize('get_testcases', [False, True])
+def test_wrong_root_tag(etree, tmp_path, get_testcases):
+    path = _write_xml(tmp_path, '<package><testsuite/></package>')
+    with pytest.raises(ValueError, match='the root tag is neither'):
+        parse_xunit_xml(path, get_testcases=get_testcases)
+
+
+@pytest.mark.parametrize('get_testcases', [False, True])
+@pytest.mark.parametrize('content', [
+    '',
+    'not xml',
+    '<testsuite tests="1" failures="0"><testcase name="x"></testcase',
+    '<testsuites><testsuite tests="1" failures="0"/>',
+    # invalid attributes are only reported for well-formed files
+    '<testsuite tests="1"><testcase name="a">',
+    '<package><testsuite/>',
+])
+def test_malformed_file(etree, tmp_path, get_testcases, content):
+    path = _write_xml(tmp_path, content)
+    with pytest.raises(etree.ParseError):
+        parse_xunit_xml(path, get_testcases=get_testcases)
+
+
+def _walk_xml_paths(basepath):
+    # the crawl as it was implemented with os.walk() before
+    paths = []
+    for dirpath, dirnames, filenames in os.walk(basepath):
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith('.'))
+        paths += [
+            os.path.join(dirpath, filename) for filename in sorted(filenames)
+            if filename.endswith('.xml')]
+    return paths
+
+
+@pytest.mark.parametrize('jobs', [1, 2])
+def test_get_xml_paths(tmp_path, monkeypatch, jobs):
+    for relpath in (
+        'pkg/b.xml', 'pkg/a.xml', 'pkg/a.txt', 'pkg/sub/c.xml',
+        'pkg/.hidden.xml', '.hidden/d.xml', 'pkg/dir.xml/e.xml',
+        'other/f.xml', 'unreadable/g.xml', 'top.xml',
+    ):
+        path = tmp_path / relpath
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text('')
+    (tmp_path / 'linked_dir').symlink_to(tmp_path / 'other')
+    (tmp_path / 'pkg' / 'linked.xml').symlink_to(tmp_path / 'top.xml')
+
+    # permissions aren't enforced for the root user
+    unreadable = str(tmp_path / 'unreadable')
+    scandir = os.scandir
+
+    def scandir_unless_unreadable(path):
+        if os.fspath(path) == unreadable:
+            raise PermissionError(f"Permission denied: '{path}'")
+        return scandir(path)
+
+    monkeypatch.setattr(os, 'scandir', scandir_unless_unreadable)
+
+    basepath = str(tmp_path)
+    paths = xunit._get_xml_paths(basepath, jobs=jobs)
+
+    assert paths == _walk_xml_paths(basepath)
+    assert paths == [
+        os.path.join(basepath, relpath) for relpath in (
+            'top.xml', 'other/f.xml', 'pkg/.hidden.xml', 'pkg/a.xml',
+            'pkg/b.xml', 'pkg/linked.xml', 'pkg/dir.xml/e.xml',
+            'pkg/sub/c.xml',
+        )]
+
+
+@pytest.mark.parametrize('content,level', [
+    ('<testsuite tests="1" failures="0"/>', None),
+    ('<testsuite', logging.WARNING),
+    ('<package/>', logging.DEBUG),
+    # a missing file
+    (None, logging.ERROR),
+])
+@pytest.mark.parametrize('log_level', [
+    logging.DEBUG, logging.WARNING, logging.ERROR, logging.CRITICAL])
+def test_parse_xunit_xml_safely(tmp_path, content, level, log_level):
+    path = str(tmp_path / 'result.xml')
+    if content is not None:
+        _write_xml(tmp_path, content)
+
+    result, skip_reason = xunit._parse_xunit_xml_safely(
+        path, get_testcases=True, log_level=log_level)
+
+    if level is None:
+        assert result.path == path
+        assert skip_reason is None
+        return
+    assert result is None
+    if level < log_level:
+        assert skip_reason is None
+        return
+    assert skip_reason[0] == level
+    assert skip_reason[1].startswith(f"Skipping '{path}': ")
+    assert ('Traceback' in skip_reason[1]) == (level == logging.ERROR)
+
+
+@pytest.mark.parametrize('log_level', [
+    logging.DEBUG, logging.WARNING, logging.ERROR, logging.CRITICAL])
+def test_get_test_results_in_parallel(
+    tmp_path, monkeypatch, caplog, log_level
+):
+    # more files than fit into a single chunk passed to a worker process
+    for i in range(12):
+        (tmp_path / f'valid_{i:02}.xml').write_text(
+            f'<testsuite tests="{i + 1}" failures="1">'
+            f'<testcase name="t{i}"><failure message="m{i}"/></testcase>'
+            '</testsuite>')
+        (tmp_path / f'malformed_{i:02}.xml').write_text('<testsuite')
+        (tmp_path / f'other_{i:02}.xml').write_text('<package/>')
+    (tmp_path / 'missing.xml').symlink_to(tmp_path / 'missing')
+
+    pool_sizes = []
+
+    class ProcessPoolExecutor(xunit.ProcessPoolExecutor):
+
+        def __init__(self, *, max_workers):
+            pool_sizes.append(max_workers)
+            super().__init__(max_workers=max_workers)
+
+    monkeypatch.setattr(xunit, 'ProcessPoolExecutor', ProcessPoolExecutor)
+    caplog.set_level(log_level, logger='colcon')
+
+    outcomes = {}
+    for jobs in (1, 2):
+        caplog.clear()
+        files = set()
+        results = XunitTestResult().get_test_results(
+            tmp_path, collect_details=True, files=files, jobs=jobs)
+        outcomes[jobs] = (
+            sorted((r.path, _get_counts(r), r.details) for r in results),
+            files,
+            [(r.levelno, r.getMessage()) for r in caplog.records])
+
+    assert pool_sizes == [2]
+    assert outcomes[2] == outcomes[1]
+
+    results, files, records = outcomes[2]
+    valid_paths = [str(tmp_path / f'valid_{i:02}.xml') for i in range(12)]
+    assert results == [
+        (path, (i + 1, 0, 1, 0), [f't{i}\n<<< failure message\n  m{i}\n>>>'])
+        for i, path in enumerate(valid_paths)]
+    assert files == set(valid_paths)
+    # the skipped files are logged in the order of their paths
+    levels = \
+        [logging.WARNING] * 12 + [logging.ERROR] + [logging.DEBUG] * 12
+    assert [level for level, _ in records] == [
+        level for level in levels if level >= log_level]
+    assert all(message.startswith("Skipping '") for _, message in records)